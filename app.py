@@ -1,84 +1,172 @@
 import os
-import glob
-import subprocess
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from cache_manager import get_cache_manager
+import json
+import threading
+import time
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Flask, render_template, request, jsonify, send_from_directory, make_response, abort
+from werkzeug.utils import safe_join
+from cache_manager import LazyCacheManager
+import create_map_poster
 
 app = Flask(__name__)
-cache = get_cache_manager()
+cache = LazyCacheManager()
+
+# Posters are rendered in-process so heavy imports load once and the
+# cache manager is shared with the generator. Renders run on a bounded pool
+# while request threads stay free for /health, /api/cache/* and /posters/*
+GENERATE_TIMEOUT = 600  # 10 minutes
+_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+
+# Identical concurrent requests share one render
+_in_flight = {}
+_in_flight_lock = threading.RLock()
 
 BASE_DIR = os.getcwd()
 POSTER_DIR = os.path.join(BASE_DIR, 'posters')
 THEME_DIR = os.path.join(BASE_DIR, 'themes')
 os.makedirs(POSTER_DIR, exist_ok=True)
 
+# Optional nginx internal location mapped to POSTER_DIR (e.g. "/_posters/").
+# When set, the proxy streams poster bytes via X-Accel-Redirect
+POSTER_ACCEL_PREFIX = os.environ.get('POSTER_ACCEL_PREFIX')
+POSTER_MAX_AGE = 86400  # Poster filenames are unique, so they never change
+
+DEFAULT_THEMES = ["feature_based", "gradient_roads", "noir", "dark", "light"]
+
+# Theme list is rebuilt only when the themes directory changes
+_themes_cache = {'mtime': None, 'list': []}
+
+def list_themes():
+    """Return theme names, rescanning THEME_DIR only when its mtime changes"""
+    try:
+        mtime = os.stat(THEME_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return DEFAULT_THEMES
+    
+    if mtime != _themes_cache['mtime']:
+        with os.scandir(THEME_DIR) as entries:
+            themes = sorted(
+                entry.name[:-5] for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()
+            )
+        _themes_cache['list'] = themes
+        _themes_cache['mtime'] = mtime
+    
+    return _themes_cache['list'] or DEFAULT_THEMES
+
 @app.route('/')
 def index():
-    themes = []
-    # List themes from the cloned directory
-    if os.path.exists(THEME_DIR):
-        files = glob.glob(os.path.join(THEME_DIR, "*.json"))
-        themes = [os.path.basename(f).replace(".json", "") for f in files]
-    if not themes: 
-        themes = ["feature_based", "gradient_roads", "noir", "dark", "light"]
-    return render_template('index.html', themes=themes)
+    return render_template('index.html', themes=list_themes())
+
+def _submit_poster(city, country, theme, radius):
+    """
+    Start a render, or attach to one already running with the same parameters.
+    create_poster() serves repeat requests from its own poster cache.
+    """
+    key = cache._generate_key(city.lower(), country.lower(), theme, radius)
+    
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = _executor.submit(create_map_poster.generate_poster,
+                                      city, country, radius, theme)
+            _in_flight[key] = future
+            future.add_done_callback(lambda _: _forget_in_flight(key))
+    
+    return future
+
+def _forget_in_flight(key):
+    with _in_flight_lock:
+        _in_flight.pop(key, None)
 
 @app.route('/generate', methods=['POST'])
 def generate():
     data = request.json
     city = data.get('city')
     country = data.get('country')
-    theme = data.get('theme')
-    radius = str(data.get('radius', 15000))
+    theme = data.get('theme') or 'feature_based'
+    radius = data.get('radius', 15000)
     
     if not city or not country:
         return jsonify({'success': False, 'error': 'City and Country required.'})
     
-    # Call the original script present in the clone
-    cmd = [
-        "python", "create_map_poster.py", 
-        "--city", city, 
-        "--country", country, 
-        "--distance", radius, 
-        "--theme", theme
-    ]
-    
     try:
-        existing_files = set(glob.glob(os.path.join(POSTER_DIR, "*.png")))
-        # 10-minute timeout (600 seconds)
-        subprocess.run(cmd, check=True, timeout=600)
+        radius = int(radius)
         
-        current_files = set(glob.glob(os.path.join(POSTER_DIR, "*.png")))
-        new_files = list(current_files - existing_files)
-        
-        if new_files:
-            latest_file = max(new_files, key=os.path.getctime)
-            return jsonify({
-                'success': True, 
-                'filename': os.path.basename(latest_file)
-            })
-        else:
-            return jsonify({
-                'success': False, 
-                'error': 'Script finished but no image file found.'
-            })
+        future = _submit_poster(city, country, theme, radius)
+        poster_path = future.result(timeout=GENERATE_TIMEOUT)
+        return jsonify({
+            'success': True, 
+            'filename': os.path.basename(poster_path)
+        })
+    except FutureTimeoutError:
+        return jsonify({
+            'success': False, 
+            'error': 'Poster generation timed out after 10 minutes.'
+        })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/posters/<path:filename>')
 def serve_poster(filename):
-    return send_from_directory(POSTER_DIR, filename)
+    if POSTER_ACCEL_PREFIX:
+        poster_path = safe_join(POSTER_DIR, filename)
+        if poster_path is None or not os.path.isfile(poster_path):
+            abort(404)
+        response = make_response('')
+        # Percent-encode: slugs keep non-ASCII city names, which headers can't carry raw
+        response.headers['X-Accel-Redirect'] = POSTER_ACCEL_PREFIX.rstrip('/') + '/' + quote(filename)
+        response.headers['Content-Type'] = 'image/png'
+    else:
+        response = send_from_directory(POSTER_DIR, filename, max_age=POSTER_MAX_AGE)
+    
+    response.headers['Cache-Control'] = f'public, max-age={POSTER_MAX_AGE}, immutable'
+    return response
 
 # Cache management endpoints
+
+# Last stats scan, reused for a second so bursts of health polls scan once
+STATS_TTL = 1.0
+_stats_cache = {'at': 0.0, 'stats': None, 'etag': None}
+_stats_lock = threading.Lock()
+
+def _get_cache_stats():
+    """Return (stats, etag), rescanning the cache directories at most once per STATS_TTL"""
+    with _stats_lock:
+        now = time.monotonic()
+        if _stats_cache['stats'] is None or now - _stats_cache['at'] > STATS_TTL:
+            stats, etag = cache.get_cache_stats_with_etag()
+            _stats_cache.update(at=now, stats=stats, etag=etag)
+        return _stats_cache['stats'], _stats_cache['etag']
+
+def _invalidate_cache_stats():
+    with _stats_lock:
+        _stats_cache['stats'] = None
+
+def _not_modified(etag):
+    """Build a 304 response if the client already has this ETag"""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    return None
+
 @app.route('/api/cache/stats', methods=['GET'])
 def cache_stats():
     """Get cache statistics"""
     try:
-        stats = cache.get_cache_stats()
-        return jsonify({
+        stats, etag = _get_cache_stats()
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        response = jsonify({
             'success': True,
             'stats': stats
         })
+        response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({
             'success': False,
@@ -99,6 +187,7 @@ def clear_cache_endpoint():
             }), 400
         
         cache.clear_cache(cache_type)
+        _invalidate_cache_stats()
         
         return jsonify({
             'success': True,
@@ -115,6 +204,7 @@ def cleanup_cache_endpoint():
     """Remove expired cache files"""
     try:
         removed = cache.cleanup_expired()
+        _invalidate_cache_stats()
         return jsonify({
             'success': True,
             'message': f'Removed {removed} expired files',
@@ -130,8 +220,12 @@ def cleanup_cache_endpoint():
 def health():
     """Health check with cache info"""
     try:
-        stats = cache.get_cache_stats()
-        return jsonify({
+        stats, etag = _get_cache_stats()
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        response = jsonify({
             'status': 'healthy',
             'cache': {
                 'enabled': True,
@@ -141,11 +235,29 @@ def health():
                 'posters_count': stats['posters']['count']
             }
         })
+        response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({
             'status': 'degraded',
             'error': str(e)
         }), 500
 
+def _warm_geocoding_cache():
+    """Pre-populate the geocoding cache for POPULAR_CITIES (JSON list of [city, country])"""
+    try:
+        cities = json.loads(os.environ.get('POPULAR_CITIES', '[]'))
+    except ValueError as e:
+        app.logger.warning(f"Ignoring invalid POPULAR_CITIES: {e}")
+        return
+    
+    # Cache hits are skipped; misses are fetched at Nominatim's 1 req/s
+    try:
+        for _ in create_map_poster.get_coordinates_batch(cities):
+            pass
+    except Exception as e:
+        app.logger.warning(f"Geocoding warm-up stopped: {e}")
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5025, debug=False)
+    threading.Thread(target=_warm_geocoding_cache, daemon=True).start()
+    app.run(host='0.0.0.0', port=5025, debug=False, threaded=True)
@@ -3,20 +3,61 @@ Caching module for MapToPoster
 Caches geocoding results, OSM data, and optionally generated posters
 """
 import os
+import io
 import json
 import hashlib
 import pickle
 import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Tuple
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
+import zstandard as zstd
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class _OsmData(dict):
+    """Loaded OSM cache entry (a dict subclass so it can be weakly referenced)"""
+
+
+def link_or_copy(src: str, dst: str):
+    """
+    Place a poster at dst, hard-linking to src when possible
+    
+    Posters are tens of MB and never modified after saving, so a hard link
+    avoids copying the bytes. Falls back to a copy across filesystems.
+    dst is always replaced, never written through.
+    
+    Args:
+        src: Existing poster file
+        dst: Destination path (replaced if it exists)
+    """
+    # Unique per writer; os.link needs a name that doesn't exist yet. dst may
+    # share its inode with another poster, so it is replaced, not written into
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
 class CacheManager:
     """Manages caching for geocoding, OSM data, and generated posters"""
     
@@ -34,30 +75,57 @@ class CacheManager:
         
         # Create cache directories
         for directory in [self.geocoding_dir, self.osm_dir, self.poster_dir]:
-            directory.mkdir(parents=True, exist_ok=True)
+            if not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+        
+        # Directories removed by clear_cache() for each cache type
+        self._clear_map = {
+            'all': [self.geocoding_dir, self.osm_dir, self.poster_dir],
+            'geocoding': [self.geocoding_dir],
+            'osm': [self.osm_dir],
+            'posters': [self.poster_dir]
+        }
         
         # Cache expiration times (in days)
         self.geocoding_ttl = 90  # Coordinates rarely change
         self.osm_ttl = 7  # OSM data changes more frequently
         self.poster_ttl = 30  # Posters can be cached longer
+        self._geocoding_ttl_s = self.geocoding_ttl * 86400.0
+        self._osm_ttl_s = self.osm_ttl * 86400.0
+        self._poster_ttl_s = self.poster_ttl * 86400.0
+        
+        # In-memory layers over the disk cache. Geocoding results are small and
+        # kept in a bounded LRU; OSM data is only weakly referenced so
+        # concurrent requests share one deserialized graph without pinning it
+        self._geo_mem = OrderedDict()
+        self._geo_mem_size = 4096
+        self._osm_mem = weakref.WeakValueDictionary()
+        self._mem_lock = threading.Lock()
         
         logger.info(f"Cache manager initialized at {self.cache_dir}")
     
-    def _generate_key(self, *args, **kwargs) -> str:
+    @staticmethod
+    def _generate_key(*args, **kwargs) -> str:
         """Generate a unique cache key from arguments"""
-        key_data = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True)
-        return hashlib.md5(key_data.encode()).hexdigest()
+        hasher = hashlib.blake2b(digest_size=16)
+        for arg in args:
+            hasher.update(repr(arg).encode())
+            hasher.update(b'\x1f')
+        for name in sorted(kwargs):
+            hasher.update(name.encode())
+            hasher.update(b'=')
+            hasher.update(repr(kwargs[name]).encode())
+            hasher.update(b'\x1f')
+        return hasher.hexdigest()
     
-    def _is_cache_valid(self, cache_file: Path, ttl_days: int) -> bool:
+    def _is_cache_valid(self, cache_file: Path, ttl_seconds: float) -> bool:
         """Check if cache file exists and is not expired"""
-        if not cache_file.exists():
+        try:
+            mtime = cache_file.stat().st_mtime
+        except FileNotFoundError:
             return False
         
-        # Check file age
-        file_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
-        age = datetime.now() - file_time
-        
-        if age > timedelta(days=ttl_days):
+        if time.time() - mtime > ttl_seconds:
             logger.info(f"Cache expired: {cache_file.name}")
             return False
         
@@ -76,15 +144,26 @@ class CacheManager:
         Returns:
             Tuple of (latitude, longitude) or None if not cached
         """
-        cache_key = self._generate_key(city.lower(), country.lower())
+        mem_key = (city.lower(), country.lower())
+        with self._mem_lock:
+            coords = self._geo_mem.get(mem_key)
+            if coords is not None:
+                self._geo_mem.move_to_end(mem_key)
+        if coords is not None:
+            logger.info(f"Geocoding cache HIT (memory): {city}, {country}")
+            return coords
+        
+        cache_key = _key_for_geocoding(*mem_key)
         cache_file = self.geocoding_dir / f"{cache_key}.json"
         
-        if self._is_cache_valid(cache_file, self.geocoding_ttl):
+        if self._is_cache_valid(cache_file, self._geocoding_ttl_s):
             try:
                 with open(cache_file, 'r') as f:
                     data = json.load(f)
+                coords = (data['latitude'], data['longitude'])
+                self._remember_geocoding(mem_key, coords)
                 logger.info(f"Geocoding cache HIT: {city}, {country}")
-                return (data['latitude'], data['longitude'])
+                return coords
             except Exception as e:
                 logger.error(f"Error reading geocoding cache: {e}")
                 return None
@@ -102,7 +181,10 @@ class CacheManager:
             latitude: Latitude coordinate
             longitude: Longitude coordinate
         """
-        cache_key = self._generate_key(city.lower(), country.lower())
+        mem_key = (city.lower(), country.lower())
+        self._remember_geocoding(mem_key, (latitude, longitude))
+        
+        cache_key = _key_for_geocoding(*mem_key)
         cache_file = self.geocoding_dir / f"{cache_key}.json"
         
         data = {
@@ -114,12 +196,28 @@ class CacheManager:
         }
         
         try:
-            with open(cache_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Write to a temp file and swap it in so readers never see a partial
+            # file; the temp file is unique, as concurrent misses may write one key
+            fd, tmp_file = tempfile.mkstemp(dir=self.geocoding_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp_file, cache_file)
+            except BaseException:
+                os.unlink(tmp_file)
+                raise
             logger.info(f"Cached geocoding: {city}, {country}")
         except Exception as e:
             logger.error(f"Error caching geocoding: {e}")
     
+    def _remember_geocoding(self, mem_key: Tuple[str, str], coords: Tuple[float, float]):
+        """Store coordinates in the in-memory LRU, evicting the oldest entry"""
+        with self._mem_lock:
+            self._geo_mem[mem_key] = coords
+            self._geo_mem.move_to_end(mem_key)
+            if len(self._geo_mem) > self._geo_mem_size:
+                self._geo_mem.popitem(last=False)
+    
     # OSM Data Cache Methods
     
     def get_osm_data(self, latitude: float, longitude: float, 
@@ -141,12 +239,23 @@ class CacheManager:
         lon_rounded = round(longitude, 4)
         
         cache_key = self._generate_key(lat_rounded, lon_rounded, distance, network_type)
-        cache_file = self.osm_dir / f"{cache_key}.pkl"
+        cache_file = self.osm_dir / f"{cache_key}.pkl.zst"
         
-        if self._is_cache_valid(cache_file, self.osm_ttl):
+        if self._is_cache_valid(cache_file, self._osm_ttl_s):
             try:
+                mem_key = (cache_key, cache_file.stat().st_mtime_ns)
+                data = self._osm_mem.get(mem_key)
+                if data is not None:
+                    logger.info(f"OSM data cache HIT (memory): ({lat_rounded}, {lon_rounded}), dist={distance}")
+                    return data
+                
+                # Read and decompress in one go rather than streaming small reads
                 with open(cache_file, 'rb') as f:
-                    data = pickle.load(f)
+                    blob = f.read()
+                payload = zstd.ZstdDecompressor().decompressobj().decompress(blob)
+                del blob
+                data = _OsmData(pickle.loads(payload))
+                self._osm_mem[mem_key] = data
                 logger.info(f"OSM data cache HIT: ({lat_rounded}, {lon_rounded}), dist={distance}")
                 return data
             except Exception as e:
@@ -174,7 +283,7 @@ class CacheManager:
         lon_rounded = round(longitude, 4)
         
         cache_key = self._generate_key(lat_rounded, lon_rounded, distance, network_type)
-        cache_file = self.osm_dir / f"{cache_key}.pkl"
+        cache_file = self.osm_dir / f"{cache_key}.pkl.zst"
         
         data = {
             'graph': graph,
@@ -188,8 +297,21 @@ class CacheManager:
         }
         
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(data, f)
+            # Graph and GeoDataFrames compress well; zstd keeps entries small.
+            # Pickle and compress in memory so the file is written in one call
+            buffer = io.BytesIO()
+            pickle.dump(data, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+            payload = zstd.ZstdCompressor(level=3, threads=-1).compress(buffer.getbuffer())
+            del buffer
+            
+            fd, tmp_file = tempfile.mkstemp(dir=self.osm_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_file, cache_file)
+            except BaseException:
+                os.unlink(tmp_file)
+                raise
             logger.info(f"Cached OSM data: ({lat_rounded}, {lon_rounded}), dist={distance}")
         except Exception as e:
             logger.error(f"Error caching OSM data: {e}")
@@ -197,22 +319,25 @@ class CacheManager:
     # Poster Cache Methods (Optional)
     
     def get_poster(self, city: str, country: str, theme: str, 
-                   distance: int, width: int, height: int, dpi: int) -> Optional[str]:
+                   distance: int, width: int, height: int, dpi: int,
+                   version: int = 0) -> Optional[str]:
         """
         Get cached poster path
         
         Args:
             city, country, theme, distance, width, height, dpi: Poster parameters
+            version: Renderer version, bumped to invalidate stale posters
             
         Returns:
             Path to cached poster or None if not cached
         """
         cache_key = self._generate_key(
-            city.lower(), country.lower(), theme, distance, width, height, dpi
+            city.lower(), country.lower(), theme, distance, width, height, dpi,
+            version=version
         )
         cache_file = self.poster_dir / f"{cache_key}.png"
         
-        if self._is_cache_valid(cache_file, self.poster_ttl):
+        if self._is_cache_valid(cache_file, self._poster_ttl_s):
             logger.info(f"Poster cache HIT: {city}, {country}, {theme}")
             return str(cache_file)
         
@@ -220,25 +345,63 @@ class CacheManager:
         return None
     
     def set_poster(self, poster_path: str, city: str, country: str, theme: str,
-                   distance: int, width: int, height: int, dpi: int):
+                   distance: int, width: int, height: int, dpi: int,
+                   version: int = 0):
         """
         Cache a generated poster
         
         Args:
             poster_path: Path to the generated poster
             city, country, theme, distance, width, height, dpi: Poster parameters
+            version: Renderer version, bumped to invalidate stale posters
         """
         cache_key = self._generate_key(
-            city.lower(), country.lower(), theme, distance, width, height, dpi
+            city.lower(), country.lower(), theme, distance, width, height, dpi,
+            version=version
         )
         cache_file = self.poster_dir / f"{cache_key}.png"
         
         try:
-            shutil.copy2(poster_path, cache_file)
+            link_or_copy(poster_path, cache_file)
             logger.info(f"Cached poster: {city}, {country}, {theme}")
         except Exception as e:
             logger.error(f"Error caching poster: {e}")
     
+    def get_poster_by_key(self, cache_key: str) -> Optional[str]:
+        """
+        Get cached poster path for a caller-computed key
+        
+        Args:
+            cache_key: Key from _generate_key() over the full render inputs
+            
+        Returns:
+            Path to cached poster or None if not cached
+        """
+        cache_file = self.poster_dir / f"{cache_key}.png"
+        
+        if self._is_cache_valid(cache_file, self._poster_ttl_s):
+            logger.info(f"Poster cache HIT: {cache_key}")
+            return str(cache_file)
+        
+        logger.info(f"Poster cache MISS: {cache_key}")
+        return None
+    
+    def set_poster_by_key(self, cache_key: str, poster_path: str):
+        """
+        Cache a generated poster under a caller-computed key
+        
+        Args:
+            cache_key: Key from _generate_key() over the full render inputs
+            poster_path: Path to the generated poster
+        """
+        cache_file = self.poster_dir / f"{cache_key}.png"
+        
+        try:
+            link_or_copy(poster_path, cache_file)
+            logger.info(f"Cached poster: {cache_key}")
+        except Exception as e:
+            logger.error(f"Error caching poster: {e}")
+    
     # Cache Management Methods
     
     def clear_cache(self, cache_type: str = 'all'):
@@ -248,77 +411,140 @@ class CacheManager:
         Args:
             cache_type: Type of cache to clear ('all', 'geocoding', 'osm', 'posters')
         """
-        directories = {
-            'all': [self.geocoding_dir, self.osm_dir, self.poster_dir],
-            'geocoding': [self.geocoding_dir],
-            'osm': [self.osm_dir],
-            'posters': [self.poster_dir]
-        }
+        with self._mem_lock:
+            if cache_type in ('all', 'geocoding'):
+                self._geo_mem.clear()
+            if cache_type in ('all', 'osm'):
+                self._osm_mem.clear()
         
-        for directory in directories.get(cache_type, []):
-            for file in directory.glob('*'):
-                try:
-                    file.unlink()
-                    logger.info(f"Deleted cache file: {file}")
-                except Exception as e:
-                    logger.error(f"Error deleting {file}: {e}")
-        
-        logger.info(f"Cleared {cache_type} cache")
+        removed_count = 0
+        for directory in self._clear_map.get(cache_type, []):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        os.unlink(entry.path)
+                        removed_count += 1
+                    except OSError as e:
+                        logger.error(f"Error deleting {entry.path}: {e}")
+        
+        logger.info(f"Cleared {cache_type} cache: {removed_count} files")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        def get_dir_stats(directory: Path) -> Dict[str, Any]:
-            files = list(directory.glob('*'))
-            total_size = sum(f.stat().st_size for f in files if f.is_file())
-            return {
-                'count': len(files),
-                'size_mb': round(total_size / (1024 * 1024), 2)
-            }
-        
-        return {
-            'geocoding': get_dir_stats(self.geocoding_dir),
-            'osm_data': get_dir_stats(self.osm_dir),
-            'posters': get_dir_stats(self.poster_dir),
-            'total_size_mb': round(
-                sum(
-                    get_dir_stats(d)['size_mb'] 
-                    for d in [self.geocoding_dir, self.osm_dir, self.poster_dir]
-                ), 2
-            )
+        return self.get_cache_stats_with_etag()[0]
+    
+    def get_cache_stats_with_etag(self) -> Tuple[Dict[str, Any], str]:
+        """
+        Get cache statistics along with a fingerprint of the cache contents
+        
+        Returns:
+            Tuple of (stats dict, ETag string that changes whenever any cache
+            directory gains, loses or modifies a file)
+        """
+        fingerprint = hashlib.blake2b(digest_size=16)
+        
+        def get_dir_stats(directory: Path) -> Tuple[int, int]:
+            count = 0
+            total_size = 0
+            max_mtime_ns = 0
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue  # Deleted by a concurrent cleanup/clear
+                        count += 1
+                        total_size += stat.st_size
+                        max_mtime_ns = max(max_mtime_ns, stat.st_mtime_ns)
+            fingerprint.update(f"{count}:{total_size}:{max_mtime_ns};".encode())
+            return count, total_size
+        
+        def to_mb(size: int) -> float:
+            return round(size / (1024 * 1024), 2)
+        
+        geocoding_count, geocoding_size = get_dir_stats(self.geocoding_dir)
+        osm_count, osm_size = get_dir_stats(self.osm_dir)
+        poster_count, poster_size = get_dir_stats(self.poster_dir)
+        
+        stats = {
+            'geocoding': {'count': geocoding_count, 'size_mb': to_mb(geocoding_size)},
+            'osm_data': {'count': osm_count, 'size_mb': to_mb(osm_size)},
+            'posters': {'count': poster_count, 'size_mb': to_mb(poster_size)},
+            'total_size_mb': to_mb(geocoding_size + osm_size + poster_size)
         }
+        return stats, fingerprint.hexdigest()
+    
+    @staticmethod
+    def _find_expired(directory: Path, ttl_seconds: float, suffix) -> List[str]:
+        """Return paths in directory matching suffix whose age exceeds ttl_seconds"""
+        now = time.time()
+        expired = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue  # Deleted by a concurrent cleanup/clear
+                if now - mtime > ttl_seconds:
+                    expired.append(entry.path)
+        return expired
+    
+    @staticmethod
+    def _unlink(path: str) -> int:
+        """Delete a file, returning 1 if it was removed"""
+        try:
+            os.unlink(path)
+            return 1
+        except OSError as e:
+            logger.error(f"Error deleting {path}: {e}")
+            return 0
     
     def cleanup_expired(self):
         """Remove expired cache files"""
-        removed_count = 0
-        
-        # Clean geocoding cache
-        for file in self.geocoding_dir.glob('*.json'):
-            if not self._is_cache_valid(file, self.geocoding_ttl):
-                file.unlink()
-                removed_count += 1
-        
-        # Clean OSM cache
-        for file in self.osm_dir.glob('*.pkl'):
-            if not self._is_cache_valid(file, self.osm_ttl):
-                file.unlink()
-                removed_count += 1
-        
-        # Clean poster cache
-        for file in self.poster_dir.glob('*.png'):
-            if not self._is_cache_valid(file, self.poster_ttl):
-                file.unlink()
-                removed_count += 1
+        targets = [
+            (self.geocoding_dir, self._geocoding_ttl_s, '.json'),
+            (self.osm_dir, self._osm_ttl_s, ('.pkl.zst', '.pkl')),
+            (self.poster_dir, self._poster_ttl_s, '.png'),
+        ]
+        
+        # Scan the directories concurrently, then delete in parallel; on
+        # network mounts this overlaps the per-file round trips
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            expired = pool.map(lambda target: self._find_expired(*target), targets)
+            paths = [path for dir_paths in expired for path in dir_paths]
+            removed_count = sum(pool.map(self._unlink, paths))
         
         logger.info(f"Removed {removed_count} expired cache files")
         return removed_count
 
 
+@lru_cache(maxsize=1024)
+def _key_for_geocoding(city_lower: str, country_lower: str) -> str:
+    """Memoized geocoding cache key (looked up several times per request)"""
+    return CacheManager._generate_key(city_lower, country_lower)
+
+
 # Global cache instance
 _cache_manager = None
+_cache_manager_lock = threading.Lock()
 
 def get_cache_manager(cache_dir: str = "./cache") -> CacheManager:
     """Get or create global cache manager instance"""
     global _cache_manager
     if _cache_manager is None:
-        _cache_manager = CacheManager(cache_dir)
+        # First use can come from several request/warm-up threads at once;
+        # build exactly one manager so they share its in-memory layers
+        with _cache_manager_lock:
+            if _cache_manager is None:
+                _cache_manager = CacheManager(cache_dir)
     return _cache_manager
+
+
+class LazyCacheManager:
+    """Proxy that creates the global cache manager on first use"""
+    
+    def __getattr__(self, name):
+        return getattr(get_cache_manager(), name)
@@ -1,27 +1,50 @@
-import osmnx as ox
-from cache_manager import get_cache_manager
+from cache_manager import LazyCacheManager, link_or_copy
 
-cache = get_cache_manager()
-import matplotlib.pyplot as plt
+cache = LazyCacheManager()
+import matplotlib
+matplotlib.use('Agg')  # Headless rendering; no interactive backend needed
+# Figures are built directly rather than through pyplot: renders run on
+# several threads and pyplot's global figure registry is not thread-safe
+from matplotlib.figure import Figure
 from matplotlib.font_manager import FontProperties
 import matplotlib.colors as mcolors
+from matplotlib.collections import LineCollection
 import numpy as np
-from geopy.geocoders import Nominatim
+import pandas as pd
 from tqdm import tqdm
 import time
 import json
+import queue
+import threading
 import os
 from datetime import datetime
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from dataclasses import dataclass
 
-# Stadium features
-from stadium_data import find_stadium, get_stadium_coords, list_stadiums
-from image_overlay import add_badge_overlay, add_stadium_marker
+try:
+    import orjson  # Optional: faster theme JSON parsing
+except ImportError:
+    orjson = None
+
+# osmnx (geopandas, shapely, pyproj), geopy, PIL and the stadium/overlay
+# helpers are imported where they are used, so listing and cache commands
+# start without loading them
 
 THEMES_DIR = "themes"
 FONTS_DIR = "fonts"
 POSTERS_DIR = "posters"
 
+DEFAULT_WIDTH = 24
+DEFAULT_HEIGHT = 34
+DEFAULT_DPI = 500
+DRAFT_DPI = 150  # Render resolution for --draft previews
+
+# Bump whenever rendering output changes so cached posters are invalidated
+RENDER_VERSION = 4
+
 def load_fonts():
     """
     Load Roboto fonts from the fonts directory.
@@ -43,9 +66,19 @@ def load_fonts():
 
 FONTS = load_fonts()
 
+# Parse each font file once per process rather than once per poster
+if FONTS:
+    FONT_BOLD = FontProperties(fname=FONTS['bold'])
+    FONT_REGULAR = FontProperties(fname=FONTS['regular'])
+    FONT_LIGHT = FontProperties(fname=FONTS['light'])
+
 def generate_output_filename(city, theme_name, stadium_name=None):
     """
     Generate unique output filename with city/stadium, theme, and datetime.
+    
+    The name is reserved by creating an empty file, with a numeric suffix if
+    another poster was saved under the same name in the same second, so a
+    served poster URL never changes content (see app.serve_poster).
     """
     if not os.path.exists(POSTERS_DIR):
         os.makedirs(POSTERS_DIR)
@@ -55,32 +88,49 @@ def generate_output_filename(city, theme_name, stadium_name=None):
     if stadium_name:
         # Use stadium name for filename
         name_slug = stadium_name.lower().replace(' ', '_').replace("'", '')
-        filename = f"{name_slug}_{theme_name}_{timestamp}.png"
+        stem = f"{name_slug}_{theme_name}_{timestamp}"
     else:
         # Use city name
         city_slug = city.lower().replace(' ', '_')
-        filename = f"{city_slug}_{theme_name}_{timestamp}.png"
+        stem = f"{city_slug}_{theme_name}_{timestamp}"
     
-    return os.path.join(POSTERS_DIR, filename)
+    suffix = 1
+    while True:
+        filename = f"{stem}.png" if suffix == 1 else f"{stem}_{suffix}.png"
+        path = os.path.join(POSTERS_DIR, filename)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            return path
+        except FileExistsError:
+            suffix += 1
 
 def get_available_themes():
     """
-    Scans the themes directory and returns a list of available theme names.
+    Scans the themes directory and returns a tuple of available theme names.
+    The scan is cached until the directory's mtime changes (a theme file is
+    added, removed or renamed).
     """
     if not os.path.exists(THEMES_DIR):
         os.makedirs(THEMES_DIR)
-        return []
+        return ()
     
+    return _scan_themes(os.stat(THEMES_DIR).st_mtime_ns)
+
+@lru_cache(maxsize=1)
+def _scan_themes(dir_mtime_ns):
+    """Theme names in THEMES_DIR, memoized per directory mtime"""
     themes = []
     for file in sorted(os.listdir(THEMES_DIR)):
         if file.endswith('.json'):
             theme_name = file[:-5]  # Remove .json extension
             themes.append(theme_name)
-    return themes
+    return tuple(themes)
 
 def load_theme(theme_name="feature_based"):
     """
     Load theme from JSON file in themes directory.
+    Parsed themes are cached per file and mtime (see _parse_theme), so edits
+    are picked up; a missing theme or a failed read is never cached.
     """
     theme_path = os.path.join(THEMES_DIR, f"{theme_name}.json")
     
@@ -93,13 +143,43 @@ def load_theme(theme_name="feature_based"):
             return None
     
     try:
-        with open(theme_path, 'r') as f:
-            theme_data = json.load(f)
-        return theme_data
+        return _parse_theme(theme_path, os.stat(theme_path).st_mtime_ns)
     except Exception as e:
         print(f"✗ Error loading theme: {e}")
         return None
 
+@lru_cache(maxsize=32)
+def _parse_theme(theme_path, mtime_ns):
+    """
+    Parse a theme file into a read-only mapping, since the same object is
+    shared by every poster using that theme. Errors propagate, so lru_cache
+    only ever stores successful parses.
+    """
+    if orjson is not None:
+        with open(theme_path, 'rb') as f:
+            theme_data = orjson.loads(f.read())
+    else:
+        with open(theme_path, 'r') as f:
+            theme_data = json.load(f)
+    
+    # Parse hex colors once here instead of per edge/artist at render time
+    for key, value in theme_data.items():
+        if isinstance(value, str) and value.startswith('#'):
+            theme_data[key] = mcolors.to_rgba(value)
+    return MappingProxyType(theme_data)
+
+@lru_cache(maxsize=1)
+def get_geocoder():
+    """
+    Shared Nominatim geocode function, rate limited to 1 request per second
+    (Nominatim usage policy) across all threads.
+    """
+    from geopy.geocoders import Nominatim
+    from geopy.extra.rate_limiter import RateLimiter
+    
+    geolocator = Nominatim(user_agent="map_poster_generator")
+    return RateLimiter(geolocator.geocode, min_delay_seconds=1)
+
 def get_coordinates(city, country):
     """
     Get coordinates for a city with caching support.
@@ -112,10 +192,11 @@ def get_coordinates(city, country):
     
     # Cache miss - fetch from Nominatim
     print(f"⊙ Fetching coordinates for {city}, {country}...")
-    geolocator = Nominatim(user_agent="map_poster_generator")
+    geocode = get_geocoder()
     
     try:
-        location = geolocator.geocode(f"{city}, {country}")
+        # Structured query: fewer false positives than "city, country" free text
+        location = geocode({'city': city, 'country': country}, exactly_one=True, timeout=10)
         if location:
             coords = (location.latitude, location.longitude)
             # Cache the result
@@ -129,273 +210,274 @@ def get_coordinates(city, country):
         print(f"✗ Geocoding error: {e}")
         return None
 
-def get_edge_colors_by_type(G, THEME):
+def get_coordinates_batch(pairs):
     """
-    Assign colors to edges based on road type hierarchy.
-    """
-    edge_colors = []
+    Geocode many (city, country) pairs, yielding ((city, country), coords) as
+    each becomes available.
     
-    for u, v, k, data in G.edges(keys=True, data=True):
-        highway_type = data.get('highway', 'default')
-        
-        if isinstance(highway_type, list):
-            highway_type = highway_type[0]
-        
-        if highway_type in ['motorway', 'motorway_link', 'trunk']:
-            color = THEME['road_motorway']
-        elif highway_type in ['primary', 'primary_link']:
-            color = THEME['road_primary']
-        elif highway_type in ['secondary', 'secondary_link']:
-            color = THEME['road_secondary']
-        elif highway_type in ['tertiary', 'tertiary_link']:
-            color = THEME['road_tertiary']
-        elif highway_type in ['residential', 'living_street']:
-            color = THEME['road_residential']
+    Cache hits are yielded immediately. Misses are fetched on a background
+    thread (rate limited by get_geocoder()), so callers can start rendering
+    the first locations while the rest are still being geocoded.
+    """
+    misses = []
+    for city, country in pairs:
+        coords = cache.get_geocoding(city, country)
+        if coords is not None:
+            yield (city, country), coords
         else:
-            color = THEME['road_default']
-        
-        edge_colors.append(color)
+            misses.append((city, country))
+    
+    if not misses:
+        return
     
-    return edge_colors
+    results = queue.Queue()
+    
+    done = object()  # Sentinel: the worker has finished, normally or not
+    
+    def worker():
+        try:
+            for city, country in misses:
+                results.put(((city, country), get_coordinates(city, country)))
+        except BaseException as e:
+            results.put(e)
+        finally:
+            results.put(done)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = results.get()
+        if item is done:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+# Road styling by OSM highway tag: (theme color key, line width)
+_HIGHWAY_STYLE = {
+    'motorway': ('road_motorway', 1.2),
+    'motorway_link': ('road_motorway', 1.2),
+    'trunk': ('road_motorway', 1.0),
+    'primary': ('road_primary', 1.0),
+    'primary_link': ('road_primary', 0.5),
+    'secondary': ('road_secondary', 0.8),
+    'secondary_link': ('road_secondary', 0.5),
+    'tertiary': ('road_tertiary', 0.6),
+    'tertiary_link': ('road_tertiary', 0.5),
+    'residential': ('road_residential', 0.4),
+    'living_street': ('road_residential', 0.4),
+}
+_DEFAULT_STYLE = ('road_default', 0.5)
 
-def get_edge_widths_by_type(G):
+# Distinct styles as small lookup tables, indexed by a per-tag int8 style id
+_STYLES = list(dict.fromkeys([*_HIGHWAY_STYLE.values(), _DEFAULT_STYLE]))
+_HIGHWAY_STYLE_IDS = {hw: _STYLES.index(style) for hw, style in _HIGHWAY_STYLE.items()}
+_DEFAULT_STYLE_ID = _STYLES.index(_DEFAULT_STYLE)
+_STYLE_WIDTHS = np.array([width for _, width in _STYLES])
+
+def get_highway_types(edges):
     """
-    Assign line widths based on road importance.
+    Return the highway tag of every edge in an edge GeoDataFrame as a Series.
+    Edges tagged with several types use the first one.
     """
-    edge_widths = []
+    if 'highway' not in edges:
+        return pd.Series('default', index=edges.index)
     
-    for u, v, k, data in G.edges(keys=True, data=True):
-        highway_type = data.get('highway', 'default')
-        
-        if isinstance(highway_type, list):
-            highway_type = highway_type[0]
-        
-        if highway_type in ['motorway', 'motorway_link']:
-            width = 1.2
-        elif highway_type in ['trunk', 'primary']:
-            width = 1.0
-        elif highway_type in ['secondary']:
-            width = 0.8
-        elif highway_type in ['tertiary']:
-            width = 0.6
-        elif highway_type in ['residential', 'living_street']:
-            width = 0.4
-        else:
-            width = 0.5
-        
-        edge_widths.append(width)
+    highway = edges['highway']
+    return highway.map(lambda h: h[0] if isinstance(h, list) else h).fillna('default')
+
+def get_edge_style(edges, THEME):
+    """
+    Assign colors (by road type hierarchy) and line widths (by road importance)
+    to edges in a single pass over the edge GeoDataFrame.
+    
+    Returns:
+        (edge_colors, edge_widths) arrays in edges order; colors are an
+        (N, 4) float32 RGBA array
+    """
+    highway = get_highway_types(edges)
     
-    return edge_widths
+    # One dict lookup per edge for its style id, then gather colors and widths
+    # from the per-style tables with NumPy fancy indexing
+    style_ids = highway.map(_HIGHWAY_STYLE_IDS).fillna(_DEFAULT_STYLE_ID).to_numpy(dtype=np.int8)
+    palette = np.array([THEME[key] for key, _ in _STYLES], dtype=np.float32).reshape(-1, 4)
+    return palette[style_ids], _STYLE_WIDTHS[style_ids]
+
+def plot_street_network(ax, edges, edge_colors, edge_widths, padding=0.02, bbox=None):
+    """
+    Draw all street edges as a single LineCollection (one artist instead of
+    one path per edge) and set up the view the way ox.plot_graph does:
+    edge bounds plus padding, with a latitude-corrected aspect ratio.
+    
+    If bbox (west, south, east, north) is given, edges are clipped to it and
+    the view is framed on it, so nothing outside the poster area is drawn.
+    """
+    import shapely
+    
+    geometries = edges.geometry.to_numpy()
+    if bbox is not None:
+        # Edges kept by truncate_by_edge overhang the bbox; trim them. A clipped
+        # edge can split into several parts (or none), so gather styles to match
+        geometries, edge_index = shapely.get_parts(
+            shapely.clip_by_rect(geometries, *bbox), return_index=True
+        )
+        edge_colors = edge_colors[edge_index]
+        edge_widths = edge_widths[edge_index]
+    
+    west, south, east, north = bbox if bbox is not None else edges.total_bounds
+    pad_x = (east - west) * padding
+    pad_y = (north - south) * padding
+    ax.set_xlim(west - pad_x, east + pad_x)
+    ax.set_ylim(south - pad_y, north + pad_y)
+    ax.set_aspect(1 / np.cos(np.deg2rad((south + north) / 2)))
+    
+    # Vertices within half an output pixel of the line are invisible at the
+    # figure's dpi; drop them (Douglas-Peucker) so Agg draws fewer segments
+    extent = ax.get_window_extent()
+    tolerance = 0.5 * min((east - west) / extent.width, (north - south) / extent.height)
+    geometries = shapely.simplify(geometries, tolerance, preserve_topology=False)
+    
+    # Pull every vertex in one allocation, then split it back into per-edge views
+    coords = shapely.get_coordinates(geometries)
+    segments = np.split(coords, np.cumsum(shapely.get_num_coordinates(geometries))[:-1])
+    
+    ax.add_collection(LineCollection(
+        segments,
+        colors=edge_colors,
+        linewidths=edge_widths,
+        rasterized=True,  # One raster layer in vector (PDF/SVG) output
+        zorder=1
+    ))
+
+@lru_cache(maxsize=32)
+def _fade_array(bg_rgba, grad_rgba):
+    """
+    RGBA rows blending from gradient color (top row) to bg (bottom row),
+    passed straight to imshow so no colormap/normalization is involved.
+    Two columns are enough; aspect='auto' stretches them across the axes.
+    Cached per color pair and read-only, so batch runs share one array.
+    """
+    t = np.linspace(0, 1, 256).reshape(256, 1, 1)
+    blend = np.array(grad_rgba) * (1 - t) + np.array(bg_rgba) * t
+    return np.broadcast_to(blend, (256, 2, 4))
 
 def create_gradient_fade(ax, THEME, height_fraction=0.15):
     """
     Add gradient fade at top and bottom of the poster.
     """
-    gradient = np.linspace(0, 1, 256).reshape(256, 1)
-    gradient = np.hstack([gradient] * 100)
-    
-    bg_color = mcolors.to_rgba(THEME['bg'])
-    grad_color = mcolors.to_rgba(THEME.get('gradient_color', THEME['bg']))
-    
-    cmap_top = mcolors.LinearSegmentedColormap.from_list(
-        'fade_top', [grad_color, bg_color]
-    )
-    cmap_bottom = mcolors.LinearSegmentedColormap.from_list(
-        'fade_bottom', [bg_color, grad_color]
-    )
+    fade = _fade_array(mcolors.to_rgba(THEME['bg']),
+                       mcolors.to_rgba(THEME.get('gradient_color', THEME['bg'])))
     
     # Top fade
-    ax.imshow(gradient, extent=[0, 1, 1-height_fraction, 1], 
-              aspect='auto', cmap=cmap_top, alpha=0.6,
+    ax.imshow(fade, extent=[0, 1, 1-height_fraction, 1], 
+              aspect='auto', alpha=0.6,
               transform=ax.transAxes, zorder=10)
     
     # Bottom fade
-    ax.imshow(np.flipud(gradient), extent=[0, 1, 0, height_fraction],
-              aspect='auto', cmap=cmap_bottom, alpha=0.6,
+    ax.imshow(fade, extent=[0, 1, 0, height_fraction],
+              aspect='auto', alpha=0.6,
               transform=ax.transAxes, zorder=10)
 
-def create_poster(city, country, theme_name='feature_based', distance=29000, 
-                 width=24, height=34, dpi=500, attribution='BlueBearLabs',
-                 stadium=None, badge_path=None, coords=None, marker_style='star'):
+def fetch_street_network(point, distance):
     """
-    Create a map poster with caching support for OSM data.
-    
-    Args:
-        city: City name
-        country: Country name
-        theme_name: Theme to use
-        distance: Map radius in meters
-        width: Poster width in inches (default: 24)
-        height: Poster height in inches (default: 34)
-        dpi: Resolution (default: 500)
-        attribution: Custom attribution text (default: 'BlueBearLabs')
-        stadium: Stadium name to center on (optional)
-        badge_path: Path to team badge PNG (optional)
-        coords: Manual coordinates as (lat, lon) tuple (optional)
-        marker_style: Stadium marker style - 'star', 'pin', 'circle', 'crosshair', or None
+    Fetch the street network around a point. Returns None on failure.
     """
-    stadium_data = None
-    display_name = city  # For output filename
-    
-    print(f"\n{'='*60}")
-    
-    # Get coordinates (priority: coords > stadium > city)
-    if coords:
-        # Manual coordinates provided
-        latitude, longitude = coords
-        print(f"📍 Mode: Manual Coordinates")
-        print(f"📍 Coordinates: {latitude:.4f}, {longitude:.4f}")
-    elif stadium:
-        # Look up stadium
-        stadium_data = find_stadium(stadium)
-        if stadium_data:
-            latitude = stadium_data['lat']
-            longitude = stadium_data['lon']
-            city = stadium_data['city']  # Override city with stadium city
-            country = stadium_data['country']  # Override country
-            display_name = stadium_data['name']  # Use stadium name for display
-            print(f"🏟️  Mode: Stadium")
-            print(f"🏟️  Stadium: {stadium_data['name']}")
-            print(f"⚽  Team: {stadium_data['team']}")
-            print(f"📍 Location: {city}, {country}")
-            print(f"📍 Coordinates: {latitude:.4f}, {longitude:.4f}")
-        else:
-            print(f"⚠️  Stadium '{stadium}' not found in database.")
-            print(f"⚠️  Falling back to city geocoding...")
-            coords_result = get_coordinates(city, country)
-            if coords_result is None:
-                print("✗ Failed to get coordinates. Exiting.")
-                return None
-            latitude, longitude = coords_result
-    else:
-        # Standard city geocoding
-        print(f"🌆 Mode: City")
-        coords_result = get_coordinates(city, country)
-        if coords_result is None:
-            print("✗ Failed to get coordinates. Exiting.")
-            return None
-        latitude, longitude = coords_result
-    
-    print(f"🎨 Theme: {theme_name}")
-    print(f"📏 Distance: {distance}m")
-    print(f"📐 Size: {width}x{height} inches @ {dpi} DPI")
-    print(f"✍️  Attribution: {attribution}")
-    if badge_path:
-        print(f"🎭 Badge: {os.path.basename(badge_path)}")
-    print(f"{'='*60}\n")
-    
-    # Load theme
-    THEME = load_theme(theme_name)
-    if THEME is None:
-        print("✗ Failed to load theme. Exiting.")
+    import osmnx as ox
+    try:
+        G = ox.graph_from_point(
+            point, 
+            dist=distance, 
+            dist_type='bbox',
+            network_type='all',
+            truncate_by_edge=True
+        )
+        # graph_from_point already simplifies; what is left to drop for drawing
+        # is the reverse copy of every two-way street (same geometry, drawn twice).
+        # The undirected graph is what gets cached, so this runs once per area
+        G = ox.convert.to_undirected(G)
+        print(f"   ✓ Graph: {len(G.nodes)} nodes, {len(G.edges)} edges")
+        return G
+    except Exception as e:
+        print(f"   ✗ Error fetching graph: {e}")
         return None
+
+def _select_features(features, column, value, label):
+    """Return the rows of features where column == value, or None if there are none."""
+    if column in features:
+        selected = features[features[column] == value]
+        if not selected.empty:
+            print(f"   ✓ {label}: {len(selected)} features")
+            return selected
+    print(f"   ℹ No {label.lower()} features found")
+    return None
+
+def fetch_water_and_parks(point, distance):
+    """
+    Fetch water features and parks around a point with a single Overpass query.
+    Returns (water, parks), either of which is None if there are none.
+    """
+    import osmnx as ox
+    try:
+        features = ox.features_from_point(
+            point,
+            tags={'natural': 'water', 'leisure': 'park'},
+            dist=distance
+        )
+    except Exception as e:
+        print(f"   ℹ No water features or parks: {e}")
+        return None, None
     
-    point = (latitude, longitude)
-    
-    # Check OSM cache first
-    print(f"⊙ Checking OSM data cache...")
-    cached_osm = cache.get_osm_data(latitude, longitude, distance, 'all')
-    
-    if cached_osm is not None:
-        print(f"✓ Using cached OSM data")
-        G = cached_osm['graph']
-        water = cached_osm['water']
-        parks = cached_osm['parks']
-    else:
-        # Cache miss - fetch from OSM (slow!)
-        print(f"⊙ Fetching OSM data...")
-        print(f"   This may take several minutes for the first time...")
-        
-        # Fetch graph
-        print("   → Fetching street network...")
-        try:
-            G = ox.graph_from_point(
-                point, 
-                dist=distance, 
-                dist_type='bbox',
-                network_type='all',
-                truncate_by_edge=True
-            )
-            print(f"   ✓ Graph: {len(G.nodes)} nodes, {len(G.edges)} edges")
-        except Exception as e:
-            print(f"   ✗ Error fetching graph: {e}")
-            G = None
-        
-        # Fetch water features
-        print("   → Fetching water features...")
-        try:
-            water = ox.features_from_point(
-                point,
-                tags={'natural': 'water'},
-                dist=distance
-            )
-            if water is not None and not water.empty:
-                print(f"   ✓ Water: {len(water)} features")
-            else:
-                print(f"   ℹ No water features found")
-                water = None
-        except Exception as e:
-            print(f"   ℹ No water features: {e}")
-            water = None
-        
-        # Fetch parks
-        print("   → Fetching parks...")
-        try:
-            parks = ox.features_from_point(
-                point,
-                tags={'leisure': 'park'},
-                dist=distance
-            )
-            if parks is not None and not parks.empty:
-                print(f"   ✓ Parks: {len(parks)} features")
-            else:
-                print(f"   ℹ No parks found")
-                parks = None
-        except Exception as e:
-            print(f"   ℹ No parks: {e}")
-            parks = None
-        
-        # Cache the OSM data for next time
-        print(f"\n✓ Caching OSM data for future use...")
-        cache.set_osm_data(latitude, longitude, distance, 'all', G, water, parks)
+    if features is None or features.empty:
+        print(f"   ℹ No water features or parks found")
+        return None, None
     
-    if G is None:
-        print("✗ No graph data available. Cannot create poster.")
-        return None
+    water = _select_features(features, 'natural', 'water', 'Water')
+    parks = _select_features(features, 'leisure', 'park', 'Parks')
+    return water, parks
+
+@dataclass(frozen=True)
+class TextBundle:
+    """Pre-formatted poster labels, independent of theme and figure."""
+    title_spaced: str
+    subtitle: str
+    coord_text: str
+
+@lru_cache(maxsize=64)
+def _prepare_text_bundle(title, subtitle, latitude, longitude):
+    """Format the poster labels once per location; reused across themes."""
+    return TextBundle(
+        title_spaced='  '.join(title.upper()),
+        subtitle=subtitle.upper(),
+        coord_text=f"{latitude:.4f}°N  {abs(longitude):.4f}°{'E' if longitude >= 0 else 'W'}",
+    )
+
+def _render_into(fig, ax, THEME, G, water, parks, text, attribution,
+                 stadium_data=None, badge_path=None, marker_style='star', bbox=None):
+    """Draw every poster layer onto an existing (fig, ax) pair."""
+    import osmnx as ox
+    from image_overlay import add_badge_overlay, add_stadium_marker
     
-    # Create figure
-    print(f"\n🎨 Rendering poster...")
-    fig, ax = plt.subplots(figsize=(width, height), dpi=dpi)
     fig.patch.set_facecolor(THEME['bg'])
     ax.set_facecolor(THEME['bg'])
     
     # Plot water features (if any)
     if water is not None and not water.empty:
         try:
-            water.plot(ax=ax, color=THEME['water'], zorder=1)
+            water.plot(ax=ax, color=THEME['water'], rasterized=True, zorder=1)
         except:
             pass
     
     # Plot parks (if any)
     if parks is not None and not parks.empty:
         try:
-            parks.plot(ax=ax, color=THEME['parks'], zorder=2)
+            parks.plot(ax=ax, color=THEME['parks'], rasterized=True, zorder=2)
         except:
             pass
     
     # Plot street network
-    edge_colors = get_edge_colors_by_type(G, THEME)
-    edge_widths = get_edge_widths_by_type(G)
-    
-    ox.plot_graph(
-        G, ax=ax,
-        node_size=0,
-        edge_color=edge_colors,
-        edge_linewidth=edge_widths,
-        bgcolor=THEME['bg'],
-        show=False,
-        close=False
-    )
+    # Build the edge GeoDataFrame once; styling and drawing both read from it
+    edges = ox.graph_to_gdfs(G, nodes=False)
+    edge_colors, edge_widths = get_edge_style(edges, THEME)
+    plot_street_network(ax, edges, edge_colors, edge_widths, bbox=bbox)
     
     # Add badge overlay if provided (BEFORE gradient fades so it's visible)
     if badge_path and os.path.exists(badge_path):
@@ -437,20 +519,9 @@ def create_poster(city, country, theme_name='feature_based', distance=29000,
     
     # Add text labels
     if FONTS:
-        font_bold = FontProperties(fname=FONTS['bold'])
-        font_regular = FontProperties(fname=FONTS['regular'])
-        font_light = FontProperties(fname=FONTS['light'])
-        
-        # Title text (city name or stadium name)
-        title_text = display_name.upper()
-        if stadium_data:
-            # For stadiums, use stadium name
-            title_text = stadium_data['name'].upper()
-        
         # City/Stadium name (spaced letters)
-        title_spaced = '  '.join(title_text)
-        ax.text(0.5, 0.14, title_spaced,
-                fontproperties=font_bold,
+        ax.text(0.5, 0.14, text.title_spaced,
+                fontproperties=FONT_BOLD,
                 fontsize=88,
                 color=THEME['text'],
                 ha='center',
@@ -466,15 +537,8 @@ def create_poster(city, country, theme_name='feature_based', distance=29000,
                 zorder=11)
         
         # Subtitle (country or team name)
-        if stadium_data:
-            # For stadiums, show team name
-            subtitle = stadium_data['team'].upper()
-        else:
-            # For cities, show country
-            subtitle = country.upper()
-        
-        ax.text(0.5, 0.10, subtitle,
-                fontproperties=font_light,
+        ax.text(0.5, 0.10, text.subtitle,
+                fontproperties=FONT_LIGHT,
                 fontsize=38,
                 color=THEME['text'],
                 ha='center',
@@ -483,9 +547,8 @@ def create_poster(city, country, theme_name='feature_based', distance=29000,
                 zorder=11)
         
         # Coordinates
-        coord_text = f"{latitude:.4f}°N  {abs(longitude):.4f}°{'E' if longitude >= 0 else 'W'}"
-        ax.text(0.5, 0.07, coord_text,
-                fontproperties=font_light,
+        ax.text(0.5, 0.07, text.coord_text,
+                fontproperties=FONT_LIGHT,
                 fontsize=27,
                 color=THEME['text'],
                 ha='center',
@@ -495,7 +558,7 @@ def create_poster(city, country, theme_name='feature_based', distance=29000,
         
         # Attribution - BlueBearLabs
         ax.text(0.95, 0.02, attribution,
-                fontproperties=font_light,
+                fontproperties=FONT_LIGHT,
                 fontsize=22,
                 color=THEME['text'],
                 ha='right',
@@ -507,24 +570,204 @@ def create_poster(city, country, theme_name='feature_based', distance=29000,
     # Remove axes
     ax.set_axis_off()
     ax.margins(0)
+
+
+def create_poster(city, country, theme_name='feature_based', distance=29000, 
+                 width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, dpi=DEFAULT_DPI,
+                 attribution='BlueBearLabs',
+                 stadium=None, badge_path=None, coords=None, marker_style='star',
+                 render_dpi=None, figure=None, force=False):
+    """
+    Create a map poster with caching support for OSM data.
     
-    # Save
-    output_file = generate_output_filename(
-        city, 
-        theme_name, 
-        stadium_name=stadium_data['name'] if stadium_data else None
+    Args:
+        city: City name
+        country: Country name
+        theme_name: Theme to use
+        distance: Map radius in meters
+        width: Poster width in inches (default: 24)
+        height: Poster height in inches (default: 34)
+        dpi: Resolution (default: 500)
+        attribution: Custom attribution text (default: 'BlueBearLabs')
+        stadium: Stadium name to center on (optional)
+        badge_path: Path to team badge PNG (optional)
+        coords: Manual coordinates as (lat, lon) tuple (optional)
+        marker_style: Stadium marker style - 'star', 'pin', 'circle', 'crosshair', or None
+        render_dpi: Resolution to render at, upscaled to dpi on save (default: dpi).
+                    Pixel count grows with dpi², so a low value gives fast previews
+        figure: (fig, ax) pair to draw into instead of a new figure (optional).
+                See create_posters_batch()
+        force: Re-render even if an identical poster is cached (default: False)
+    """
+    render_dpi = render_dpi or dpi
+    stadium_data = None
+    display_name = city  # For output filename
+    
+    print(f"\n{'='*60}")
+    
+    # Get coordinates (priority: coords > stadium > city)
+    if coords:
+        # Manual coordinates provided
+        latitude, longitude = coords
+        print(f"📍 Mode: Manual Coordinates")
+        print(f"📍 Coordinates: {latitude:.4f}, {longitude:.4f}")
+    elif stadium:
+        # Look up stadium
+        from stadium_data import find_stadium
+        stadium_data = find_stadium(stadium)
+        if stadium_data:
+            latitude = stadium_data['lat']
+            longitude = stadium_data['lon']
+            city = stadium_data['city']  # Override city with stadium city
+            country = stadium_data['country']  # Override country
+            display_name = stadium_data['name']  # Use stadium name for display
+            print(f"🏟️  Mode: Stadium")
+            print(f"🏟️  Stadium: {stadium_data['name']}")
+            print(f"⚽  Team: {stadium_data['team']}")
+            print(f"📍 Location: {city}, {country}")
+            print(f"📍 Coordinates: {latitude:.4f}, {longitude:.4f}")
+        else:
+            print(f"⚠️  Stadium '{stadium}' not found in database.")
+            print(f"⚠️  Falling back to city geocoding...")
+            coords_result = get_coordinates(city, country)
+            if coords_result is None:
+                print("✗ Failed to get coordinates. Exiting.")
+                return None
+            latitude, longitude = coords_result
+    else:
+        # Standard city geocoding
+        print(f"🌆 Mode: City")
+        coords_result = get_coordinates(city, country)
+        if coords_result is None:
+            print("✗ Failed to get coordinates. Exiting.")
+            return None
+        latitude, longitude = coords_result
+    
+    print(f"🎨 Theme: {theme_name}")
+    print(f"📏 Distance: {distance}m")
+    print(f"📐 Size: {width}x{height} inches @ {dpi} DPI")
+    if render_dpi != dpi:
+        print(f"📐 Rendering at {render_dpi} DPI, upscaled on save")
+    print(f"✍️  Attribution: {attribution}")
+    if badge_path:
+        print(f"🎭 Badge: {os.path.basename(badge_path)}")
+    print(f"{'='*60}\n")
+    
+    # Load theme
+    THEME = load_theme(theme_name)
+    if THEME is None:
+        print("✗ Failed to load theme. Exiting.")
+        return None
+    
+    stadium_name = stadium_data['name'] if stadium_data else None
+    
+    # Identical inputs produce an identical poster, so reuse a finished render
+    poster_key = cache._generate_key(
+        round(latitude, 6), round(longitude, 6), distance, theme_name,
+        width, height, dpi, render_dpi,
+        title=display_name, country=country, stadium=stadium_name,
+        attribution=attribution, badge=badge_path, marker=marker_style,
+        version=RENDER_VERSION
     )
+    cached_poster = None if force else cache.get_poster_by_key(poster_key)
+    if cached_poster:
+        output_file = generate_output_filename(city, theme_name, stadium_name=stadium_name)
+        try:
+            link_or_copy(cached_poster, output_file)
+        except BaseException:
+            # Don't leave the empty name reservation behind to be served
+            os.unlink(output_file)
+            raise
+        print(f"✅ Reused cached poster")
+        print(f"📁 Saved to: {output_file}")
+        print(f"{'='*60}\n")
+        return output_file
+    
+    point = (latitude, longitude)
+    
+    # Check OSM cache first
+    print(f"⊙ Checking OSM data cache...")
+    load_start = time.perf_counter()
+    cached_osm = cache.get_osm_data(latitude, longitude, distance, 'all')
+    
+    if cached_osm is not None:
+        print(f"✓ Using cached OSM data (loaded in {time.perf_counter() - load_start:.2f}s)")
+        G = cached_osm['graph']
+        water = cached_osm['water']
+        parks = cached_osm['parks']
+    else:
+        # Cache miss - fetch from OSM (slow!)
+        print(f"⊙ Fetching OSM data...")
+        print(f"   This may take several minutes for the first time...")
+        
+        # The Overpass queries are independent and network-bound,
+        # so run them concurrently
+        print("   → Fetching street network, water features and parks...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            graph_future = executor.submit(fetch_street_network, point, distance)
+            features_future = executor.submit(fetch_water_and_parks, point, distance)
+            G = graph_future.result()
+            water, parks = features_future.result()
+        
+        # Cache the OSM data for next time
+        print(f"\n✓ Caching OSM data for future use...")
+        cache.set_osm_data(latitude, longitude, distance, 'all', G, water, parks)
+    
+    if G is None:
+        print("✗ No graph data available. Cannot create poster.")
+        return None
+    
+    # Create figure
+    print(f"\n🎨 Rendering poster...")
+    if figure is None:
+        fig = Figure(figsize=(width, height), dpi=render_dpi)
+        ax = fig.subplots()
+    else:
+        # Reuse a batch figure: same canvas and warm font cache, fresh axes
+        fig, ax = figure
+        ax.clear()
+        fig.set_size_inches(width, height)
+        fig.set_dpi(render_dpi)
+    # Axes fill the figure so the saved image is exactly width x height and
+    # savefig needs no extra tight-bbox layout pass
+    fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
+    # Title is the city or stadium name, subtitle the country or team name
+    subtitle = stadium_data['team'] if stadium_data else country
+    text = _prepare_text_bundle(display_name, subtitle, latitude, longitude)
+    # Same (west, south, east, north) box graph_from_point fetched with dist_type='bbox'
+    from osmnx.utils_geo import bbox_from_point
+    bbox = bbox_from_point(point, dist=distance)
+    _render_into(fig, ax, THEME, G, water, parks, text, attribution,
+                 stadium_data=stadium_data, badge_path=badge_path,
+                 marker_style=marker_style, bbox=bbox)
+    
+    # Save
+    output_file = generate_output_filename(city, theme_name, stadium_name=stadium_name)
     print(f"💾 Saving to {output_file}...")
     
-    plt.savefig(
-        output_file,
-        dpi=dpi,
-        bbox_inches='tight',
-        facecolor=THEME['bg'],
-        edgecolor='none',
-        pad_inches=0.1
-    )
-    plt.close()
+    # Render to a temp file and move it onto the reserved name, never writing
+    # through a path that could be a hard link into the poster cache. The temp
+    # name is unique per thread (not mkstemp, so the poster keeps umask permissions)
+    tmp_file = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp.png"
+    try:
+        fig.savefig(
+            tmp_file,
+            dpi=render_dpi,
+            facecolor=THEME['bg'],
+            edgecolor='none'
+        )
+        if render_dpi != dpi:
+            upscale_image(tmp_file, dpi / render_dpi, dpi)
+        
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        # Drop the temp file and the empty name reservation
+        for path in (tmp_file, output_file):
+            if os.path.exists(path):
+                os.unlink(path)
+        raise
+    
+    cache.set_poster_by_key(poster_key, output_file)
     
     print(f"\n✅ Poster created successfully!")
     print(f"📁 Saved to: {output_file}")
@@ -532,6 +775,42 @@ def create_poster(city, country, theme_name='feature_based', distance=29000,
     
     return output_file
 
+def create_posters_batch(jobs):
+    """
+    Create several posters, reusing one Agg figure for all of them.
+    
+    Args:
+        jobs: Iterable of dicts of create_poster() keyword arguments
+    
+    Returns:
+        List of output file paths (None for jobs that failed)
+    """
+    fig = Figure()
+    ax = fig.subplots()
+    return [create_poster(figure=(fig, ax), **job) for job in jobs]
+
+def upscale_image(path, scale, dpi):
+    """
+    Resize a PNG in place by scale with Lanczos resampling, tagging it with dpi.
+    """
+    from PIL import Image
+    with Image.open(path) as img:
+        resized = img.resize(
+            (round(img.width * scale), round(img.height * scale)),
+            Image.Resampling.LANCZOS
+        )
+    resized.save(path, dpi=(dpi, dpi), optimize=True)
+
+def generate_poster(city, country, distance, theme):
+    """
+    Generate a city poster in-process and return the saved file path.
+    Used by the web app so heavy imports and caches are shared across requests.
+    """
+    output_file = create_poster(city, country, theme_name=theme, distance=distance)
+    if output_file is None:
+        raise RuntimeError(f"Poster generation failed for {city}, {country}")
+    return output_file
+
 def main():
     parser = argparse.ArgumentParser(
         description='Generate beautiful minimalist map posters (cities & stadiums)',
@@ -564,6 +843,8 @@ Examples:
     # Theme and size
     parser.add_argument('-t', '--theme', default='feature_based',
                        help='Theme name (default: feature_based)')
+    parser.add_argument('--all-themes', action='store_true',
+                       help='Render one poster per available theme, reusing a single figure')
     parser.add_argument('-d', '--distance', type=int, default=29000,
                        help='Map radius in meters (default: 29000)')
     parser.add_argument('--width', type=int, default=24,
@@ -572,6 +853,12 @@ Examples:
                        help='Poster height in inches (default: 34)')
     parser.add_argument('--dpi', type=int, default=500,
                        help='Resolution in DPI (default: 500)')
+    parser.add_argument('--dpi-render', type=int,
+                       help='Render at this DPI and upscale to --dpi on save (default: same as --dpi)')
+    parser.add_argument('--draft', action='store_true',
+                       help=f'Fast preview: render at {DRAFT_DPI} DPI and upscale to --dpi')
+    parser.add_argument('--force', action='store_true',
+                       help='Re-render even if an identical poster is already cached')
     parser.add_argument('--attribution', type=str, 
                        default='BlueBearLabs',
                        help='Attribution text in bottom right corner (default: BlueBearLabs)')
@@ -606,6 +893,7 @@ Examples:
     
     # Handle listing commands
     if args.list_stadiums:
+        from stadium_data import list_stadiums
         stadiums = list_stadiums()
         print("\n" + "="*90)
         print("AVAILABLE STADIUMS")
@@ -678,21 +966,28 @@ Examples:
     # Parse marker style
     marker_style = args.marker if args.marker != 'none' else None
     
-    # Create poster
-    create_poster(
+    poster_args = dict(
         city=city,
         country=country,
-        theme_name=args.theme,
         distance=args.distance,
         width=args.width,
         height=args.height,
         dpi=args.dpi,
+        render_dpi=DRAFT_DPI if args.draft else args.dpi_render,
         attribution=args.attribution,
         stadium=args.stadium,
         badge_path=args.badge,
         coords=coords,
-        marker_style=marker_style
+        marker_style=marker_style,
+        force=args.force
     )
+    
+    # Create poster(s)
+    if args.all_themes:
+        create_posters_batch([{**poster_args, 'theme_name': theme}
+                              for theme in get_available_themes()])
+    else:
+        create_poster(theme_name=args.theme, **poster_args)
 
 if __name__ == "__main__":
     main()
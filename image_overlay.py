@@ -3,13 +3,23 @@ Image overlay module for MapToPoster
 Handles badge/logo placement on maps
 """
 import os
+from functools import lru_cache
 from PIL import Image, ImageDraw
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+from matplotlib.collections import LineCollection, PatchCollection
 import numpy as np
 
 
+@lru_cache(maxsize=16)
+def _alpha_lut(alpha):
+    """256-entry uint8 table scaling an alpha channel by alpha (truncating)"""
+    lut = (np.arange(256) * alpha).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
 def add_badge_overlay(ax, badge_path, position, size=0.15, alpha=0.9, glow=True):
     """
     Add a team badge overlay to the map
@@ -43,14 +53,14 @@ def add_badge_overlay(ax, badge_path, position, size=0.15, alpha=0.9, glow=True)
         new_height = int(new_width / aspect_ratio)
         badge_img = badge_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
         
-        # Apply alpha
+        # Apply alpha via a uint8 lookup table (OffsetImage takes the array directly)
+        badge_array = np.asarray(badge_img)
         if alpha < 1.0:
-            badge_array = np.array(badge_img)
-            badge_array[:, :, 3] = (badge_array[:, :, 3] * alpha).astype(np.uint8)
-            badge_img = Image.fromarray(badge_array)
+            badge_array = badge_array.copy()
+            badge_array[:, :, 3] = _alpha_lut(alpha)[badge_array[:, :, 3]]
         
         # Create OffsetImage
-        imagebox = OffsetImage(badge_img, zoom=1.0)
+        imagebox = OffsetImage(badge_array, zoom=1.0)
         
         # Create annotation
         # If position is (lat, lon), convert to data coordinates
@@ -97,32 +107,36 @@ def add_badge_overlay(ax, badge_path, position, size=0.15, alpha=0.9, glow=True)
 
 def add_stadium_marker(ax, coords, color='red', size=200, alpha=0.8, style='star'):
     """
-    Add a marker at stadium location
+    Add a marker at one or more stadium locations
+    
+    All markers of a call share one artist per marker part, so placing many
+    stadiums costs the same number of artists as placing one.
     
     Args:
         ax: Matplotlib axes object
-        coords: (lat, lon) tuple in axes coordinates (0-1)
+        coords: (x, y) tuple, or sequence of (x, y) tuples, in axes coordinates (0-1)
         color: Marker color
         size: Marker size
         alpha: Transparency
         style: 'star', 'circle', 'pin', or 'crosshair'
     """
-    x, y = coords
+    xy = np.atleast_2d(np.asarray(coords, dtype=float))
+    x, y = xy[:, 0], xy[:, 1]
     
+    # color= rather than c=, so an RGBA tuple is never read as per-point values
     if style == 'star':
         ax.scatter(x, y, 
                   marker='*', 
                   s=size, 
-                  c=color, 
+                  color=color, 
                   alpha=alpha,
                   edgecolors='white',
                   linewidths=2,
                   transform=ax.transAxes,
                   zorder=12)
     elif style == 'circle':
-        circle = patches.Circle(
-            (x, y),
-            0.02,  # Radius in axes coordinates
+        circles = PatchCollection(
+            [patches.Circle(center, 0.02) for center in xy],  # Radius in axes coordinates
             transform=ax.transAxes,
             facecolor=color,
             edgecolor='white',
@@ -130,13 +144,13 @@ def add_stadium_marker(ax, coords, color='red', size=200, alpha=0.8, style='star
             alpha=alpha,
             zorder=12
         )
-        ax.add_patch(circle)
+        ax.add_collection(circles, autolim=False)
     elif style == 'pin':
         # Map pin shape (triangle pointing down with circle on top)
         ax.scatter(x, y, 
                   marker='v',  # Triangle down
                   s=size, 
-                  c=color, 
+                  color=color, 
                   alpha=alpha,
                   edgecolors='white',
                   linewidths=2,
@@ -145,26 +159,33 @@ def add_stadium_marker(ax, coords, color='red', size=200, alpha=0.8, style='star
         ax.scatter(x, y + 0.015,  # Circle above
                   marker='o', 
                   s=size * 0.4, 
-                  c=color, 
+                  color=color, 
                   alpha=alpha,
                   edgecolors='white',
                   linewidths=2,
                   transform=ax.transAxes,
                   zorder=12)
     elif style == 'crosshair':
-        # Crosshair
+        # Crosshair: one horizontal and one vertical stroke per marker
         line_length = 0.03
-        ax.plot([x - line_length, x + line_length], [y, y],
-               color=color, linewidth=3, alpha=alpha,
-               transform=ax.transAxes, zorder=12)
-        ax.plot([x, x], [y - line_length, y + line_length],
-               color=color, linewidth=3, alpha=alpha,
-               transform=ax.transAxes, zorder=12)
+        horizontal = np.stack([np.column_stack([x - line_length, y]),
+                               np.column_stack([x + line_length, y])], axis=1)
+        vertical = np.stack([np.column_stack([x, y - line_length]),
+                             np.column_stack([x, y + line_length])], axis=1)
+        ax.add_collection(LineCollection(
+            np.concatenate([horizontal, vertical]),
+            colors=color,
+            linewidths=3,
+            alpha=alpha,
+            capstyle='projecting',  # Match the Line2D default
+            transform=ax.transAxes,
+            zorder=12
+        ), autolim=False)
         # Center dot
         ax.scatter(x, y, 
                   marker='o', 
                   s=size * 0.3, 
-                  c=color, 
+                  color=color, 
                   alpha=alpha,
                   edgecolors='white',
                   linewidths=2,
@@ -177,20 +198,22 @@ def calculate_axes_position(lat, lon, map_bounds):
     Convert lat/lon to axes coordinates (0-1 range)
     
     Args:
-        lat: Latitude
-        lon: Longitude
+        lat: Latitude, or array of latitudes
+        lon: Longitude, or array of longitudes
         map_bounds: (min_lat, max_lat, min_lon, max_lon) tuple
         
     Returns:
-        (x, y) in axes coordinates
+        (x, y) in axes coordinates; arrays when given arrays
     """
     min_lat, max_lat, min_lon, max_lon = map_bounds
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
     
-    # Normalize to 0-1 range
-    x = (lon - min_lon) / (max_lon - min_lon) if max_lon != min_lon else 0.5
-    y = (lat - min_lat) / (max_lat - min_lat) if max_lat != min_lat else 0.5
+    # Normalize to 0-1 range ([()] unwraps scalar input back to a scalar)
+    x = (lon - min_lon) / (max_lon - min_lon) if max_lon != min_lon else np.full_like(lon, 0.5)
+    y = (lat - min_lat) / (max_lat - min_lat) if max_lat != min_lat else np.full_like(lat, 0.5)
     
-    return (x, y)
+    return (x[()], y[()])
 
 
 def create_circular_badge_mask(image_path, output_path=None):
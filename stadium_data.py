@@ -192,6 +192,24 @@ STADIUMS = {
 }
 
 
+# Lookup indices, built once at import time. Buckets keep STADIUMS order so
+# results match a linear scan over the dict.
+_RECORDS = [{**stadium, 'key': key} for key, stadium in STADIUMS.items()]
+_SEARCH_FIELDS = [(stadium['name'].lower(), stadium['team'].lower(), stadium)
+                  for stadium in STADIUMS.values()]
+_BY_NAME = {}
+_BY_TEAM = {}
+_BY_COUNTRY = {}
+_BY_SPORT = {}
+for _record in _RECORDS:
+    _stadium = STADIUMS[_record['key']]
+    _BY_NAME.setdefault(_stadium['name'].lower(), _stadium)
+    _BY_TEAM.setdefault(_stadium['team'].lower(), _stadium)
+    _BY_COUNTRY.setdefault(_stadium['country'], []).append(_record)
+    _BY_SPORT.setdefault(_stadium['sport'], []).append(_record)
+del _record, _stadium
+
+
 def find_stadium(search_term):
     """
     Find stadium by name, team, or key
@@ -208,11 +226,14 @@ def find_stadium(search_term):
     if search_term in STADIUMS:
         return STADIUMS[search_term]
     
-    # Search by name or team
-    for key, stadium in STADIUMS.items():
-        if (search_term in stadium['name'].lower() or 
-            search_term in stadium['team'].lower() or
-            search_term == key):
+    # Exact name or team match
+    stadium = _BY_NAME.get(search_term) or _BY_TEAM.get(search_term)
+    if stadium:
+        return stadium
+    
+    # Partial match on name or team
+    for name, team, stadium in _SEARCH_FIELDS:
+        if search_term in name or search_term in team:
             return stadium
     
     return None
@@ -229,16 +250,17 @@ def list_stadiums(country=None, sport=None):
     Returns:
         List of stadium dicts
     """
-    results = []
-    
-    for key, stadium in STADIUMS.items():
-        if country and stadium['country'] != country:
-            continue
-        if sport and stadium['sport'] != sport:
-            continue
-        results.append({**stadium, 'key': key})
+    if country:
+        results = _BY_COUNTRY.get(country, [])
+        if sport:
+            results = [s for s in results if s['sport'] == sport]
+    elif sport:
+        results = _BY_SPORT.get(sport, [])
+    else:
+        results = _RECORDS
     
-    return results
+    # Copies, so callers can't modify the shared index
+    return [dict(s) for s in results]
 
 
 def get_stadium_coords(search_term):